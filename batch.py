@@ -0,0 +1,181 @@
+import multiprocessing
+import os
+import time
+
+from locations import Terminator, Country
+from maps import CombinedMap
+from coordinates import Time
+
+from database import COUNTRY_DB
+
+
+class MapSpec:
+    """
+    Stores everything needed to render a single map in a batch
+    """
+    def __init__(self, name, country_lists=[], colours=[], time=None):
+        """
+        Args:
+            name          (str):
+                Identifier for the map, used as the output filename
+            country_lists (list, optional):
+                List of lists of country names to shade, one list per colour
+            colours       (list, optional):
+                Colour to plot each list in country_lists, see maps.CombinedMap
+            time          (int, optional):
+                Timestamp (seconds since 1 Jan 1970, UTC) to draw the terminator at.
+                No terminator is drawn if None
+        """
+        self.name           = name
+        self.country_lists  = country_lists
+        self.colours        = colours
+        self.time           = time
+
+
+# Country objects for every country in COUNTRY_DB, built once in the parent process
+# Workers are forked after this is filled, so they read it (and the databases)
+# through copy-on-write memory rather than each unpickling their own copy
+_COUNTRIES = {}
+
+OUTPUT_FORMATS = {'html', 'json'}
+
+
+def _preprocess_countries():
+    """
+    Builds a Country object for every country in COUNTRY_DB and stores it in _COUNTRIES
+    """
+    if not _COUNTRIES:
+        for country_name in COUNTRY_DB.name:
+            _COUNTRIES[country_name] = Country(country_name)
+
+
+def _render_job(job):
+    """
+    Renders a single MapSpec and writes it to disk. Runs inside a worker process
+    Any exception is caught and returned so one bad spec doesn't stop the rest of the batch
+
+    Args:
+        job (tuple(MapSpec, str, tuple)): Spec to render, output directory, and file formats to write
+
+    Returns:
+        tuple(str, list, float, str): Spec name, paths written, seconds taken,
+                                      error message (None if rendered successfully)
+    """
+    spec, out_dir, formats = job
+    start = time.perf_counter()
+
+    paths = []
+    try:
+        country_lists = []
+        for country_list in spec.country_lists:
+            unknown_countries = [country_name for country_name in country_list if country_name not in _COUNTRIES]
+            assert(len(unknown_countries) == 0), \
+                  f'Unable to find {", ".join(unknown_countries)}!'
+            country_lists.append([_COUNTRIES[country_name] for country_name in country_list])
+
+        terminator = Terminator(Time(spec.time)) if spec.time is not None else None
+
+        combined_map = CombinedMap(country_lists=country_lists,
+                                   terminator=terminator,
+                                   colours=spec.colours)
+
+        # Write straight to disk so only the paths are sent back to the parent process
+        for fmt in formats:
+            path = os.path.join(out_dir, f'{spec.name}.{fmt}')
+            if fmt == 'html':
+                combined_map.fig.write_html(path)
+            elif fmt == 'json':
+                combined_map.fig.write_json(path)
+            paths.append(path)
+
+    except Exception as e:
+        # Send back a string rather than the exception, as not every exception can be pickled
+        return spec.name, paths, time.perf_counter() - start, f'{type(e).__name__}: {e}'
+
+    return spec.name, paths, time.perf_counter() - start, None
+
+
+def render_batch(specs, out_dir='maps', formats=('html',), processes=None, chunksize=1):
+    """
+    Renders many maps across a process pool, writing each figure to disk as soon as it is done
+
+    Databases and country geometries are loaded once in this process and shared read-only
+    with the workers by forking, so this requires a platform supporting the 'fork' start method
+
+    A spec that fails to render (e.g. unknown country name, empty country list) is reported
+    as failed and the rest of the batch carries on. Specs with a duplicate name, or a name
+    that isn't a plain filename, are rejected without being rendered
+
+    Args:
+        specs     (iterable of MapSpec):
+            Maps to render. Can be a generator, but the pool reads it ahead of the workers,
+            queueing specs in bounded chunks rather than taking one each time a worker is free
+        out_dir   (str, optional):
+            Directory to write figures to. Defaults to "maps".
+        formats   (tuple, optional):
+            File formats to write each figure as, any of 'html' and 'json'. Defaults to ('html',).
+        processes (int, optional):
+            Number of worker processes. Defaults to os.cpu_count().
+        chunksize (int, optional):
+            Number of specs handed to a worker at a time. Defaults to 1.
+
+    Returns:
+        list of tuple(str, list, float, str):
+            (name, paths written, seconds taken, error message) for each map, in order of completion.
+            Error message is None for maps that rendered successfully
+    """
+    formats = tuple(formats)
+    unknown_formats = set(formats) - OUTPUT_FORMATS
+    if unknown_formats:
+        raise ValueError(f'Unknown output format(s) {", ".join(sorted(unknown_formats))}! '
+                         f'Expected any of {", ".join(sorted(OUTPUT_FORMATS))}')
+
+    os.makedirs(out_dir, exist_ok=True)
+    _preprocess_countries()
+
+    results = []
+
+    def _jobs():
+        # Runs in the pool's task handler thread as it reads ahead through the specs
+        seen_names = set()
+        for spec in specs:
+            name = str(spec.name)
+            if name in ('', '.', '..') or os.path.basename(name) != name \
+                    or (os.altsep is not None and os.altsep in name):
+                error = f'Invalid map name {name!r}, must be a plain filename'
+            elif name in seen_names:
+                error = f'Duplicate map name {name!r}'
+            else:
+                seen_names.add(name)
+                yield spec, out_dir, formats
+                continue
+
+            print(f'Rejected {name}: {error}')
+            results.append((name, [], 0.0, error))
+
+    batch_start = time.perf_counter()
+    with multiprocessing.get_context('fork').Pool(processes) as pool:
+        for name, paths, seconds, error in pool.imap_unordered(_render_job, _jobs(), chunksize):
+            if error is None:
+                print(f'Rendered {name} in {seconds:.2f}s')
+            else:
+                print(f'Failed {name} after {seconds:.2f}s: {error}')
+            results.append((name, paths, seconds, error))
+
+    n_failed = sum(1 for result in results if result[3] is not None)
+    print(f'Rendered {len(results) - n_failed} maps ({n_failed} failed) '
+          f'in {time.perf_counter() - batch_start:.2f}s')
+
+    return results
+
+
+if __name__ == '__main__':
+    current_time = int(time.time())
+
+    specs = (MapSpec(name=f'map_{i}',
+                     country_lists=[['France', 'Japan'], ['Brazil']],
+                     colours=['rgba(  0,255,255, 0.5)', 'rgba(255,  0,  0, 0.5)'],
+                     time=current_time)
+             for i in range(8))
+
+    render_batch(specs, out_dir='maps', formats=('html', 'json'))
@@ -34,9 +34,10 @@ class CombinedMap:
         """        
         # Get list of map objects for each type
         city_maps       = [CityMap(city_list)       for city_list    in city_lists]
-        country_maps    = [CountryMap(country_list) for country_list in country_lists]
+        country_maps    = [CountryMap(country_list, colours[i]) if i < len(colours) else CountryMap(country_list)
+                           for i, country_list in enumerate(country_lists)]
         trip_maps       = [TripMap(trip_list)       for trip_list    in trip_lists]
-        terminator_map  = [TerminatorMap(terminator)]
+        terminator_map  = [TerminatorMap(terminator)] if terminator is not None else []
 
         all_maps        = city_maps + country_maps + trip_maps + terminator_map
 